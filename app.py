@@ -1,14 +1,27 @@
 import streamlit as st
 import pandas as pd
-import json
-import plotly.express as px
-import plotly.graph_objects as go
+import orjson
 from datetime import datetime
 import os
 
-# Load main data from JSON
-with open('backup_20250328_203836.json') as f:
-    data = json.load(f)
+DATA_FILE = 'backup_20250328_203836.json'
+STOCKLIST_FILE = 'stocklist.xlsx'
+PROGRESS_UPDATE_EVERY = 50
+
+# Load main data from JSON (parsed once per process and shared across reruns)
+@st.cache_resource
+def load_data():
+    with open(DATA_FILE, 'rb') as f:
+        return orjson.loads(f.read())
+
+# Load stock list workbook sheets (mtime is part of the cache key so edits are picked up)
+@st.cache_data
+def load_sheet_names(path, mtime):
+    return pd.ExcelFile(path).sheet_names
+
+@st.cache_data
+def load_sheet(path, sheet_name, mtime):
+    return pd.read_excel(path, sheet_name=sheet_name)
 
 # Helper function to analyze a single stock (by symbol)
 def analyze_stock(symbol):
@@ -32,29 +45,67 @@ def analyze_stock(symbol):
 st.set_page_config(layout="wide")
 st.title("📈 Stock Market Analysis Dashboard")
 
-# Load all symbols into overview dataframe
-stocks = []
-for symbol, stock_data in data.items():
-    result = analyze_stock(symbol)
-    if result:
-        stocks.append(result)
+data = load_data()
+
+# Overview columns and the nested JSON fields they come from
+OVERVIEW_COLUMNS = {
+    'Last Close': ('technical', 'last_close'),
+    'Volume': ('technical', 'last_volume'),
+    'RSI': ('technical', 'rsi'),
+    'Trend': ('technical', 'trend'),
+    'Next Earnings': ('earnings', 'next_earnings_prediction'),
+    'Confidence Score': ('earnings', 'prediction_metadata', 'confidence_score')
+}
+FLOAT_COLUMNS = ['Last Close', 'RSI']
+INTEGER_COLUMNS = ['Volume', 'Confidence Score']
 
-df = pd.DataFrame(stocks)
+# Marker for a field that is absent from a record (as opposed to null)
+MISSING = object()
+
+# Helper function to read a nested field, returning MISSING if any level is absent
+def get_field(record, path):
+    for key in path:
+        if not isinstance(record, dict) or key not in record:
+            return MISSING
+        record = record[key]
+    return record
+
+# Load all symbols into overview dataframe, one column at a time
+@st.cache_data
+def build_overview_df():
+    # Leave out incomplete records (e.g. failed fetches), as analyze_stock() does
+    complete = {symbol: record for symbol, record in data.items()
+                if all(get_field(record, path) is not MISSING for path in OVERVIEW_COLUMNS.values())}
+    records = list(complete.values())
+    columns = {'Symbol': list(complete.keys())}
+    for column, path in OVERVIEW_COLUMNS.items():
+        columns[column] = [get_field(record, path) for record in records]
+    overview = pd.DataFrame(columns)
+    # JSON numbers are already numeric, so a single block cast is all that's needed
+    overview[FLOAT_COLUMNS] = overview[FLOAT_COLUMNS].astype('float32')
+    for column in INTEGER_COLUMNS:
+        overview[column] = pd.to_numeric(overview[column], downcast='integer')
+    overview['Trend'] = overview['Trend'].astype('category')
+    # Sort once here so the overview table doesn't re-sort on every rerun; the
+    # selector keeps the symbols in their original order
+    return overview.sort_values("Last Close", ascending=False), list(complete)
+
+df, symbol_options = build_overview_df()
 
 # === USER UPLOADS EXCEL TO ANALYZE MULTIPLE SYMBOLS ===
 st.sidebar.title("Navigation")
 
 st.sidebar.subheader("📄 Analyze Custom Stock List")
-if os.path.exists("stocklist.xlsx"):
-    xl = pd.ExcelFile("stocklist.xlsx")
-    stock_sheets = xl.sheet_names
+if os.path.exists(STOCKLIST_FILE):
+    stocklist_mtime = os.path.getmtime(STOCKLIST_FILE)
+    stock_sheets = load_sheet_names(STOCKLIST_FILE, stocklist_mtime)
 
     selected_sheet = st.sidebar.selectbox("Select Sheet", stock_sheets)
     analyze_button = st.sidebar.button("Analyze Stocks")
 
     if analyze_button:
         try:
-            stock_df = pd.read_excel("stocklist.xlsx", sheet_name=selected_sheet)
+            stock_df = load_sheet(STOCKLIST_FILE, selected_sheet, stocklist_mtime)
             if "Symbol" not in stock_df.columns:
                 st.error("❌ The selected sheet doesn't have a 'Symbol' column.")
             else:
@@ -66,14 +117,17 @@ if os.path.exists("stocklist.xlsx"):
                 status_text = st.empty()
 
                 for i, symbol in enumerate(symbols):
-                    status_text.text(f"Analyzing {symbol} ({i+1}/{len(symbols)})...")
                     result = analyze_stock(symbol)
                     if result:
                         results.append(result)
-                    progress_bar.progress((i + 1) / len(symbols))
+                    # Each UI update is a round trip to the browser, so only refresh periodically
+                    if i % PROGRESS_UPDATE_EVERY == 0 or i == len(symbols) - 1:
+                        status_text.text(f"Analyzing {symbol} ({i+1}/{len(symbols)})...")
+                        progress_bar.progress((i + 1) / len(symbols))
 
                 if results:
-                    df = pd.DataFrame(results)
+                    df = pd.DataFrame(results).sort_values("Last Close", ascending=False)
+                    symbol_options = [result["Symbol"] for result in results]
                     st.success("✅ Analysis complete!")
                 else:
                     st.warning("⚠️ No valid stock data found.")
@@ -83,20 +137,27 @@ else:
     st.sidebar.warning("Please upload a file named `stocklist.xlsx` to use this feature.")
 
 # === MAIN DASHBOARD ===
-selected_symbol = st.sidebar.selectbox("Select Stock", df["Symbol"].unique())
+selected_symbol = st.sidebar.selectbox("Select Stock", symbol_options)
 
 # Overview section
 st.header("📊 Market Overview")
+# Ties go to the alphabetically first trend, as mode()[0] did
+trend_counts = df["Trend"].value_counts()
 col1, col2, col3 = st.columns(3)
 col1.metric("Total Stocks", len(df))
-col2.metric("Average RSI", round(df["RSI"].mean(), 2))
-col3.metric("Most Common Trend", df["Trend"].mode()[0])
+col2.metric("Average RSI", round(float(df["RSI"].mean()), 2))
+col3.metric("Most Common Trend", min(trend_counts.index[trend_counts == trend_counts.max()]))
 
-st.dataframe(df.sort_values("Last Close", ascending=False), use_container_width=True)
+st.dataframe(df, use_container_width=True)
 
 # Stock details
 selected_stock = data.get(selected_symbol)
 if selected_stock:
+    # Plotly is only needed for the detail charts; importing it here lets the
+    # overview render before the (slow) import runs
+    import plotly.express as px
+    import plotly.graph_objects as go
+
     st.header(f"🔍 Detailed Analysis: {selected_symbol}")
 
     # Basic Info
@@ -166,12 +227,9 @@ if selected_stock:
     if "fundamental" in selected_stock and "historical" in selected_stock["fundamental"]:
         fundamental = selected_stock["fundamental"]["historical"]
         metrics = ["Total Revenue", "Gross Profit", "Operating Income", "Net Income"]
-        fundamental_df = pd.DataFrame()
-        for metric in metrics:
-            if metric in fundamental:
-                temp_df = pd.DataFrame.from_dict(fundamental[metric], orient="index", columns=[metric])
-                temp_df.index = pd.to_datetime(temp_df.index)
-                fundamental_df = pd.concat([fundamental_df, temp_df], axis=1)
+        fundamental_df = pd.DataFrame({metric: pd.Series(fundamental[metric], dtype="float64")
+                                       for metric in metrics if metric in fundamental})
+        fundamental_df.index = pd.to_datetime(fundamental_df.index)
 
         if not fundamental_df.empty:
             fig = px.line(fundamental_df, x=fundamental_df.index, y=fundamental_df.columns,
@@ -197,36 +255,26 @@ if selected_stock:
 
             # Prediction vs Last
             st.subheader("Prediction vs Last Historical Value")
-            comparison_data = []
-            for metric in valid_predictions:
-                if metric in selected_stock["fundamental"]["historical"]:
-                    historical = selected_stock["fundamental"]["historical"][metric]
-                    if historical:
-                        last_historical = list(historical.values())[-1]
-                        predicted = valid_predictions[metric]
-                        change_pct = ((predicted - last_historical) / last_historical * 100
-                                      if last_historical != 0 else 0)
-                        comparison_data.append({
-                            "Metric": metric,
-                            "Last Historical": last_historical,
-                            "Predicted": predicted,
-                            "Change (%)": change_pct
-                        })
+            historical = selected_stock["fundamental"]["historical"]
+            last_values = {metric: next(reversed(historical[metric].values()))
+                           for metric in valid_predictions if historical.get(metric)}
+            comparison_data = [{
+                "Metric": metric,
+                "Last Historical": last_historical,
+                "Predicted": valid_predictions[metric],
+                "Change (%)": ((valid_predictions[metric] - last_historical) / last_historical * 100
+                               if last_historical != 0 else 0)
+            } for metric, last_historical in last_values.items()]
 
             if comparison_data:
                 comp_df = pd.DataFrame(comparison_data)
-                fig = go.Figure()
-                for _, row in comp_df.iterrows():
-                    fig.add_trace(go.Bar(
-                        name=row["Metric"],
-                        x=["Last Historical", "Predicted"],
-                        y=[row["Last Historical"], row["Predicted"]],
-                        text=[f"{row['Last Historical']:,.2f}", f"{row['Predicted']:,.2f}"],
-                        textposition="auto"
-                    ))
+                long_df = comp_df.melt(id_vars="Metric", value_vars=["Last Historical", "Predicted"],
+                                       var_name="Source", value_name="Value")
+                fig = px.bar(long_df, x="Source", y="Value", color="Metric", barmode="group")
+                fig.update_traces(texttemplate="%{y:,.2f}", textposition="auto")
                 fig.update_layout(
-                    barmode="group",
                     title="Comparison of Last Historical and Predicted Values",
+                    xaxis_title="",
                     yaxis_title="Value",
                     height=400
                 )